@@ -17,7 +17,7 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-import re
+import functools
 import os
 from autopkglib import ProcessorError
 from autopkglib.URLGetter import URLGetter
@@ -26,7 +26,17 @@ from autopkglib.URLGetter import URLGetter
 
 __all__ = ["AcrolinxURLProvider"]
 
-URL = "https://{}:{}@download.acrolinx.com:1443/api/deliverables/{}/download/latest"
+URL = "https://%s:%s@download.acrolinx.com:1443/api/deliverables/%s/download/latest"
+
+# Each credential falls back to the environment variable of the same name
+# when the recipe leaves it unset or as its unsubstituted placeholder.
+CREDENTIALS = ("acrolinx_uuid", "acrolinx_username", "acrolinx_password")
+
+
+@functools.lru_cache(maxsize=None)
+def _env(name):
+    """Return the environment variable `name`, read at most once per process."""
+    return os.environ.get(name)
 
 
 class AcrolinxURLProvider(URLGetter):
@@ -43,52 +53,36 @@ class AcrolinxURLProvider(URLGetter):
 
     def main(self):
         """Find the download URL"""
-        
-        uuid = self.env.get("acrolinx_uuid", None)
-        username = self.env.get("acrolinx_username", None)
-        password = self.env.get("acrolinx_password", None)
-        
-        if uuid == "%acrolinx_uuid%" or uuid == None:
-            if os.environ.get("acrolinx_uuid") is not None:
-                uuid = os.environ["acrolinx_uuid"]
-            else:
-                raise ProcessorError(
-                    "acrolinx_uuid was not provided, fallback to environment variable return None"
-                )
-        if username == "%acrolinx_username%" or username == None:
-            if os.environ.get("acrolinx_username") is not None:
-                username = os.environ["acrolinx_username"]
-            else:
-                raise ProcessorError(
-                    "acrolinx_username was not provided, fallback to environment variable return None"
-                )
-        if password == "%acrolinx_password%" or password == None:
-            if os.environ.get("acrolinx_password") is not None:
-                password = os.environ["acrolinx_password"]
-            else:
+
+        creds = {}
+        for key in CREDENTIALS:
+            value = self.env.get(key)
+            if value in (None, f"%{key}%"):
+                value = _env(key)
+            if value is None:
                 raise ProcessorError(
-                    "acrolinx_password was not provided, fallback to environment variable return None"
+                    f"{key} was not provided, fallback to environment variable return None"
                 )
-        url = URL.format(username, password, uuid)
-        cmd = [self.curl_binary(), "--write-out", "'%{json}'", url]
+            creds[key] = value
+        url = URL % (creds["acrolinx_username"], creds["acrolinx_password"], creds["acrolinx_uuid"])
+        # Only the redirect target is needed, so discard the body and have
+        # curl print nothing but the redirect URL.
+        cmd = [
+            self.curl_binary(), "--silent", "--show-error", "--fail",
+            "--output", os.devnull, "--write-out", "%{redirect_url}", url,
+        ]
         out, err, code = self.execute_curl(cmd)
         if code != 0:
             raise ProcessorError(
                 f"{cmd} exited non-zero.\n{err}"
             )
-        try:
-            # regex to match a url
-            regex = r"https?:\/\/(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&\/=]*)"
-            match = re.search(regex, out)
-
-            url = match[0]
-            self.output(f"Found URL: {url}")
-            self.env["url"] = url
-        except:
+        url = out.strip()
+        if not url:
             raise ProcessorError(
-                f"download url not found in output:\n {out}"
+                "download url not found: the server did not redirect"
             )
-        
+        self.output(f"Found URL: {url}")
+        self.env["url"] = url
 
 
 if __name__ == "__main__":
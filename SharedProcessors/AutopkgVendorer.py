@@ -1,29 +1,107 @@
 from __future__ import absolute_import
 
+import hashlib
+import json
 import os
+import re
+import shutil
+import subprocess
 import tempfile
 from datetime import datetime, timezone
 import sys
 from io import BytesIO
+from urllib.parse import quote
 import typing
 from collections import OrderedDict
 import enum
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from plistlib import dumps as plist_dumps
 
-lib_path = os.path.join(os.path.dirname(__file__), "lib")
-if lib_path not in sys.path:
-    sys.path.insert(0, lib_path)
-
-from plist_yaml_plist.plist_yaml import plist_yaml_from_dict
 from autopkglib import Processor, ProcessorError
 from autopkglib.github import GitHubSession
 from plistlib import loads as plist_loads
 
 __all__ = ["AutopkgVendorer"]
 
+YAML_HEADER_TEMPLATE = "# Downloaded from {url}\n# Commit: {commit_sha}\n# Downloaded at: {timestamp}\n\n"
+XML_HEADER_TEMPLATE = "<!--\nDownloaded from {url}\nCommit: {commit_sha}\nDownloaded at: {timestamp}\n-->\n\n"
+
+RECIPE_SUFFIX = ".recipe"
+
+# Downloads are network-bound, so let curl overlap this many transfers.
+MAX_DOWNLOAD_WORKERS = 16
+# --parallel arrived in curl 7.66 and --no-progress-meter in 7.67; older curl
+# (such as macOS 11's) fetches the same config one file at a time.
+CURL_PARALLEL_VERSION = (7, 67)
+
+# YAML conversion is CPU-bound, so spread it across processes, but only when
+# there are enough recipes to pay for starting the workers.
+MIN_RECIPES_FOR_PROCESS_POOL = 8
+
+# Downloaded files are cached by git blob SHA, which hashes their content, so
+# an entry never goes stale. API responses are cached per commit, and only
+# when the commit is a full SHA.
+DEFAULT_CACHE_DIR = os.path.expanduser("~/Library/Caches/AutopkgVendorer")
+CACHE_MAX_COMMITS = 32
+CACHE_MAX_BLOBS = 4096
+
+# The contents API lists at most this many entries per directory and has no
+# pagination to fetch the rest.
+CONTENTS_API_MAX_ENTRIES = 1000
+FULL_SHA_RE = re.compile(r"[0-9a-f]{40}")
+
+# Any root file whose name matches might be one GitHub's license detection
+# recognises (LICENSE.md, MIT-LICENSE, COPYING, UNLICENSE, OFL.txt, PATENTS, ...).
+LICENSE_NAME_RE = re.compile(r"licen[cs]e|copying|ofl|patents", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=None)
+def load_plist_yaml_from_dict():
+    """Import plist_yaml_from_dict (and with it ruamel.yaml) the first time a recipe is converted."""
+    try:
+        if __package__:
+            from .lib.plist_yaml_plist.plist_yaml import plist_yaml_from_dict
+        else:
+            # AutoPkg loads processors by file path, outside any package.
+            lib_path = os.path.join(os.path.dirname(__file__), "lib")
+            if lib_path not in sys.path:
+                sys.path.insert(0, lib_path)
+            from plist_yaml_plist.plist_yaml import plist_yaml_from_dict
+    except ImportError as e:
+        raise ProcessorError(f"Cannot convert recipes to YAML: {e}") from e
+    return plist_yaml_from_dict
+
+
+def git_blob_sha(data: bytes) -> str:
+    """Return the SHA git assigns to a blob with contents `data`."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def curl_version(curl_binary: str) -> tuple[int, int]:
+    """Return the (major, minor) version of `curl_binary`, or (0, 0) if it can't be determined."""
+    try:
+        proc = subprocess.run([curl_binary, "--version"], capture_output=True, text=True)
+    except OSError:
+        return (0, 0)
+    match = re.match(r"curl (\d+)\.(\d+)", proc.stdout)
+    return (int(match[1]), int(match[2])) if match else (0, 0)
+
+
+def curl_config_quote(value: str) -> str:
+    """Quote `value` for use in a curl config file."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
 class AutopkgVendorer(Processor):
     description = __doc__
 
+    _cache_root = DEFAULT_CACHE_DIR
+    # Cache directory for the commit being vendored; set by main() when the commit is pinned.
+    _cache_dir = None
+
     input_variables = {
         "github_repo": {"required": True, "description": "GitHub repository (owner/repo)"},
         "folder_path": {"required": True, "description": "Folder or file inside repo to download"},
@@ -33,6 +111,14 @@ class AutopkgVendorer(Processor):
         "comment_style": {"required": False, "description": "Force comment style: 'yaml' or 'xml'"},
         "convert_to_yaml": {"required": False, "description": "Convert plist/recipe to YAML (default True)"},
         "required_license": {"required": False, "description": "Required license type"},
+        "max_concurrent_downloads": {
+            "required": False,
+            "description": f"Maximum number of files downloaded at once with curl 7.67 or later (default {MAX_DOWNLOAD_WORKERS})",
+        },
+        "vendor_cache_dir": {
+            "required": False,
+            "description": f"Directory for caching downloaded files and pinned-commit API responses (default {DEFAULT_CACHE_DIR})",
+        },
         "opinionated_ordering": {
             "required": False,
             "description": "Use opinionated ordering for recipe keys (default True)",
@@ -46,6 +132,7 @@ class AutopkgVendorer(Processor):
             "required": False,
         },
     }
+
     def move_keys_to_top(self, d: dict, first_keys: list[str]) -> OrderedDict:
         """Reorder dictionary `d` so that keys in `first_keys` appear first, in that order."""
         od = OrderedDict()
@@ -57,22 +144,126 @@ class AutopkgVendorer(Processor):
                 od[key] = value
         return od
 
-    def download_text_file(self, session, repo: str, path: str, commit_sha: str) -> str:
-        raw_url = f"https://raw.githubusercontent.com/{repo}/{commit_sha}/{path}"
-        temp_file = tempfile.mktemp()
-        curl_cmd = ["/usr/bin/curl", "--location", "--silent", "--fail", "--output", temp_file, raw_url]
-
+    def create_parent_dirs(self, paths):
+        """Create each distinct parent directory of `paths` once."""
+        for parent in {os.path.dirname(path) for path in paths}:
+            os.makedirs(parent, exist_ok=True)
+
+    def commit_cache_dir(self, cache_root: str, commit_sha: str) -> typing.Optional[str]:
+        """Return the cache directory for `commit_sha`, or None if it isn't a full, immutable SHA."""
+        if not FULL_SHA_RE.fullmatch(commit_sha):
+            return None
+        cache_dir = os.path.join(cache_root, "commits", commit_sha[:2], commit_sha)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Mark the commit as recently used for prune_cache.
+        os.utime(cache_dir)
+        return cache_dir
+
+    def call_api(self, session, endpoint: str, query: str):
+        """Call the GitHub API, reusing the saved response when the commit is pinned.
+
+        Every request made here is scoped to the commit being vendored, so
+        under a full SHA a successful response never changes.
+        """
+        if self._cache_dir is None:
+            return session.call_api(endpoint, query=query)
+
+        key = hashlib.sha256(f"{endpoint}?{query}".encode("utf-8")).hexdigest()
+        cache_path = os.path.join(self._cache_dir, f"{key}.json")
         try:
-            session.download_with_curl(curl_cmd)
-            with open(temp_file, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception as e:
-            raise ProcessorError(f"Failed to download {path} at {commit_sha}: {e}")
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return json.load(f), 200
+        except (FileNotFoundError, ValueError):
+            pass
+
+        response_json, status = session.call_api(endpoint, query=query)
+        if status == 200:
+            with open(cache_path + ".part", "w", encoding="utf-8") as f:
+                json.dump(response_json, f)
+            os.replace(cache_path + ".part", cache_path)
+        return response_json, status
+
+    def blob_cache_path(self, blob_sha: str) -> str:
+        return os.path.join(self._cache_root, "blobs", blob_sha[:2], blob_sha)
+
+    def prune_cache(self, cache_root: str):
+        """Keep only the most recently used commits and blobs in the cache."""
+        for kind, keep in (("commits", CACHE_MAX_COMMITS), ("blobs", CACHE_MAX_BLOBS)):
+            try:
+                entries = [
+                    entry.path
+                    for prefix in os.scandir(os.path.join(cache_root, kind)) if prefix.is_dir()
+                    for entry in os.scandir(prefix.path)
+                ]
+            except FileNotFoundError:
+                continue
+            entries.sort(key=os.path.getmtime, reverse=True)
+            for path in entries[keep:]:
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+
+    def download_files(self, session, repo: str, commit_sha: str, downloads, max_concurrent=MAX_DOWNLOAD_WORKERS):
+        """Fetch each (item_path, blob_sha) into the blob cache in a single curl invocation so connections are reused across downloads.
+
+        Files are written next to their cache path and moved into place only
+        after their content is checked against blob_sha, so the cache never
+        holds a partial file or one that changed under a moving ref.
+        """
+        if not downloads:
+            return
+
+        config = []
+        for item_path, blob_sha in downloads:
+            raw_url = f"https://raw.githubusercontent.com/{repo}/{commit_sha}/{quote(item_path)}"
+            config.append(f"url = {curl_config_quote(raw_url)}")
+            config.append(f"output = {curl_config_quote(self.blob_cache_path(blob_sha) + '.part')}")
+
+        curl_binary = session.curl_binary()
+        curl_cmd = [curl_binary, "--location", "--silent", "--show-error", "--fail"]
+        if curl_version(curl_binary) >= CURL_PARALLEL_VERSION:
+            # --silent alone doesn't stop --parallel drawing its progress table
+            # on stderr, which would bury curl's error messages.
+            curl_cmd += ["--no-progress-meter", "--parallel", "--parallel-max", str(max_concurrent)]
+        curl_cmd += ["--config", "-"]
+        proc = subprocess.run(curl_cmd, input="\n".join(config) + "\n", capture_output=True, text=True)
+
+        failed = []
+        for item_path, blob_sha in downloads:
+            try:
+                with open(self.blob_cache_path(blob_sha) + ".part", "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                data = None
+            if data is None or git_blob_sha(data) != blob_sha:
+                failed.append(item_path)
+
+        if proc.returncode != 0 or failed:
+            # Leave nothing from a failed run behind in the cache.
+            for _, blob_sha in downloads:
+                try:
+                    os.remove(self.blob_cache_path(blob_sha) + ".part")
+                except FileNotFoundError:
+                    pass
+            if proc.returncode != 0:
+                raise ProcessorError(f"Failed to download {', '.join(failed) or 'files'} at {commit_sha}: {proc.stderr.strip()}")
+            raise ProcessorError(f"Downloaded {', '.join(failed)} did not match the tree's blob SHAs; did {commit_sha} move during the download?")
+
+        for _, blob_sha in downloads:
+            cache_path = self.blob_cache_path(blob_sha)
+            os.replace(cache_path + ".part", cache_path)
+
+    def license_type(self, session, repo: str, commit_sha: str, tree: typing.Optional[dict] = None) -> typing.Optional[str]:
+        # A complete tree listing shows whether the root has a license file at
+        # all; only ask GitHub to identify the license if it does.
+        if tree is not None and not tree.get("truncated"):
+            if not any(entry.get("type") == "blob" and "/" not in entry["path"] and self.is_license_file(entry["path"]) for entry in tree["tree"]):
+                return None
 
-    def license_type(self, session, repo: str, commit_sha: str) -> typing.Optional[str]:
         endpoint = f"/repos/{repo}/license"
         query = f"ref={commit_sha}"
-        response_json, status = session.call_api(endpoint, query=query)
+        response_json, status = self.call_api(session, endpoint, query)
         if status != 200:
             raise ProcessorError(f"GitHub API error while checking for LICENSE in root: {status}")
         return response_json["license"].get("spdx_id")
@@ -81,35 +272,67 @@ class AutopkgVendorer(Processor):
         YAML = "yaml"
         XML = "xml"
 
-    def generate_comment_header(self, repo, path, commit_sha, style: CommentStyle) -> str:
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-        github_url = f"https://github.com/{repo}/blob/{commit_sha}/{path}"
-        style = self.CommentStyle(style.lower()) if isinstance(style, str) else style
+    HEADER_TEMPLATES = {
+        CommentStyle.YAML: YAML_HEADER_TEMPLATE,
+        CommentStyle.XML: XML_HEADER_TEMPLATE,
+    }
 
-        if style == self.CommentStyle.XML:
-            return f"<!--\nDownloaded from {github_url}\nCommit: {commit_sha}\nDownloaded at: {timestamp}\n-->\n\n"
-        elif style == self.CommentStyle.YAML:
-            return f"# Downloaded from {github_url}\n# Commit: {commit_sha}\n# Downloaded at: {timestamp}\n\n"
-        else:
+    def generate_comment_header(self, path, style: CommentStyle) -> str:
+        style = self.CommentStyle(style.lower()) if isinstance(style, str) else style
+        template = self.HEADER_TEMPLATES.get(style)
+        if template is None:
             raise ProcessorError(f"Invalid comment style: {style}")
+        return template.format(url=self._blob_url_prefix + path, commit_sha=self._commit_sha, timestamp=self._timestamp)
 
     def insert_comment(self, header, content, style: CommentStyle) -> str:
         if style == self.CommentStyle.XML:
-            lines = content.splitlines(keepends=True)
-            if len(lines) >= 3:
-                return ''.join(lines[:3]) + header + ''.join(lines[3:])
+            # Slot the header in after the first three lines (XML declaration,
+            # DOCTYPE and root element) without splitting the whole document.
+            index = -1
+            for _ in range(3):
+                index = content.find("\n", index + 1)
+                if index < 0:
+                    break
+            else:
+                return content[:index + 1] + header + content[index + 1:]
         return header + content
 
     def is_license_file(self, item_name):
-        return item_name.lower() == "license"
-
-    def process_file(self, session, repo, item_path: str, item_name: str, commit_sha: str, dest_path: str, convert_to_yaml: bool = False, opinionated_ordering: bool = True):
-        file_contents = self.download_text_file(session, repo, item_path, commit_sha)
+        return LICENSE_NAME_RE.search(item_name) is not None
+
+    def convert_recipes_to_yaml(self, recipes: list[dict]) -> list[str]:
+        """Convert recipe plists to YAML, in a process pool when there are enough of them."""
+        if not recipes:
+            # Nothing to convert; don't import ruamel.yaml just to find that out.
+            return []
+        plist_yaml_from_dict = load_plist_yaml_from_dict()
+        if len(recipes) >= MIN_RECIPES_FOR_PROCESS_POOL:
+            try:
+                # plist_yaml_from_dict lives in an importable package, so it
+                # pickles by reference; workers inherit the parent's sys.path.
+                with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(recipes))) as executor:
+                    return list(executor.map(plist_yaml_from_dict, recipes))
+            except (BrokenProcessPool, OSError) as e:
+                self.output(f"Converting recipes in-process, worker pool failed: {e}")
+        return [plist_yaml_from_dict(recipe) for recipe in recipes]
+
+    def write_file(self, dest_path: str, contents: str):
+        with open(dest_path, "wb") as f:
+            f.write(contents.encode("utf-8"))
+
+    def process_file(self, repo, item_path: str, item_name: str, commit_sha: str, source_path: str, dest_path: str, convert_to_yaml: bool = False, opinionated_ordering: bool = True):
+        """Write the downloaded file at `source_path` to `dest_path` with a comment header.
+
+        Recipes being converted to YAML aren't written here; instead
+        (dest_path, header, plist_data) is returned so that vendor_path can
+        convert them all together.
+        """
+        with open(source_path, "rb") as f:
+            file_contents = f.read()
         self.output(f"Downloaded: {item_path} → {dest_path}")
 
-        if item_name.endswith(('.recipe')):
-            plist_data = plist_loads(file_contents.encode("utf-8"))
-            plist_data = dict(plist_data)
+        if item_name.endswith(RECIPE_SUFFIX):
+            plist_data = plist_loads(file_contents)
 
             if opinionated_ordering:
                 for step_index, step in enumerate(plist_data.get('Process', [])):
@@ -119,51 +342,132 @@ class AutopkgVendorer(Processor):
                 self.output(f"Reordered recipe: {item_path}")
 
             if convert_to_yaml:
-                header = self.generate_comment_header(repo, item_path, commit_sha, self.CommentStyle.YAML)
-                modified_yaml = plist_yaml_from_dict(plist_data)
-                full_contents = header + modified_yaml
-                dest_path = dest_path.replace(".recipe", ".recipe.yaml")
+                header = self.generate_comment_header(item_path, self.CommentStyle.YAML)
+                return dest_path + ".yaml", header, plist_data
             else:
                 updated_plist_str = plist_dumps(plist_data, sort_keys=False).decode("utf-8")
-                header = self.generate_comment_header(repo, item_path, commit_sha, self.CommentStyle.XML)
+                header = self.generate_comment_header(item_path, self.CommentStyle.XML)
                 full_contents = self.insert_comment(header, updated_plist_str, self.CommentStyle.XML)
         else:
             style = self.env.get("comment_style", "yaml")
-            header = self.generate_comment_header(repo, item_path, commit_sha, style)
-            full_contents = self.insert_comment(header, file_contents, style)
-
-        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-        with open(dest_path, "w", encoding="utf-8") as f:
-            f.write(full_contents)
-
-    def vendor_path(self, session, repo: str, path: str, commit_sha: str, dest_base, rel_base="", convert_to_yaml=False, opinionated_ordering=True):
+            header = self.generate_comment_header(item_path, style)
+            try:
+                text = file_contents.decode("utf-8")
+            except UnicodeDecodeError as e:
+                raise ProcessorError(f"Failed to decode {item_path} at {commit_sha}: {e}")
+            # Translate line endings as text-mode reading would, so the body matches the header.
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+            full_contents = self.insert_comment(header, text, style)
+
+        self.write_file(dest_path, full_contents)
+        return None
+
+    def collect_files(self, session, repo: str, path: str, commit_sha: str, dest_base) -> list[tuple[str, str, str, str]]:
+        """Walk `path` via the contents API and return (item_path, item_name, dest_path, blob_sha) for every file."""
         endpoint = f"/repos/{repo}/contents/{path}"
         query = f"ref={commit_sha}"
 
-        response_json, status = session.call_api(endpoint, query=query)
+        response_json, status = self.call_api(session, endpoint, query)
         if status != 200:
             raise ProcessorError(f"GitHub API error: {status} for path {path}")
 
         items = response_json if isinstance(response_json, list) else [response_json]
+        if len(items) >= CONTENTS_API_MAX_ENTRIES:
+            raise ProcessorError(f"{path} has at least {CONTENTS_API_MAX_ENTRIES} entries, so the contents API listing may be incomplete")
 
-        vendorer_paths = []
+        files = []
+        dest_prefix = os.path.join(dest_base, "")
 
         for item in items:
             item_type = item.get("type")
             item_path = item.get("path")
             item_name = item.get("name")
-            rel_path = os.path.join(rel_base, item_name)
-            dest_path = os.path.join(dest_base, rel_path)
+            dest_path = dest_prefix + item_name
 
             if item_type == "dir":
-                self.vendor_path(session, repo, item_path, commit_sha, dest_base, rel_path, convert_to_yaml)
+                files.extend(self.collect_files(session, repo, item_path, commit_sha, dest_path))
             elif item_type == "file":
-                self.process_file(session, repo, item_path, item_name, commit_sha, dest_path, convert_to_yaml, opinionated_ordering=opinionated_ordering)
-                vendorer_paths.append(dest_path)
+                files.append((item_path, item_name, dest_path, item.get("sha")))
             else:
                 self.output(f"Skipping unknown type '{item_type}' at {item_path}")
 
-        return vendorer_paths
+        return files
+
+    def fetch_tree(self, session, repo: str, commit_sha: str) -> dict:
+        """Return the whole tree at `commit_sha` from one Git Trees API call."""
+        endpoint = f"/repos/{repo}/git/trees/{commit_sha}"
+        response_json, status = self.call_api(session, endpoint, "recursive=1")
+        if status != 200:
+            raise ProcessorError(f"GitHub API error: {status} for tree at {commit_sha}")
+        return response_json
+
+    def list_tree(self, session, repo: str, path: str, commit_sha: str, dest_base, tree: dict) -> list[tuple[str, str, str, str]]:
+        """Like collect_files, but takes the files from `tree` as returned by fetch_tree."""
+        if tree.get("truncated"):
+            self.output(f"Tree for {repo} at {commit_sha} is truncated, walking {path} via the contents API")
+            return self.collect_files(session, repo, path, commit_sha, dest_base)
+
+        prefix = path.strip("/")
+        dest_prefix = os.path.join(dest_base, "")
+        files = []
+
+        for entry in tree["tree"]:
+            item_type = entry.get("type")
+            item_path = entry.get("path")
+            if prefix and item_path == prefix:
+                rel_path = os.path.basename(item_path)
+            elif not prefix or item_path.startswith(prefix + "/"):
+                rel_path = item_path[len(prefix):].lstrip("/")
+            else:
+                continue
+
+            if entry.get("mode") == "120000":
+                item_type = "symlink"
+
+            if item_type == "tree":
+                continue
+            elif item_type == "blob":
+                files.append((item_path, os.path.basename(item_path), dest_prefix + rel_path, entry.get("sha")))
+            else:
+                self.output(f"Skipping unknown type '{item_type}' at {item_path}")
+
+        if not files:
+            raise ProcessorError(f"No files found at {path} in {repo} at {commit_sha}")
+
+        return files
+
+    def vendor_path(self, session, repo: str, path: str, commit_sha: str, dest_base, convert_to_yaml=False, opinionated_ordering=True, tree=None, max_concurrent=MAX_DOWNLOAD_WORKERS):
+        if tree is None:
+            tree = self.fetch_tree(session, repo, commit_sha)
+        files = self.list_tree(session, repo, path, commit_sha, dest_base, tree)
+
+        source_paths = [self.blob_cache_path(blob_sha) for _, _, _, blob_sha in files]
+        # Identical files share a blob, so fetch each missing blob only once.
+        downloads = {}
+        cache_hits = 0
+        for (item_path, _, _, blob_sha), source_path in zip(files, source_paths):
+            if os.path.exists(source_path):
+                # Mark the blob as recently used for prune_cache.
+                os.utime(source_path)
+                cache_hits += 1
+            else:
+                downloads.setdefault(blob_sha, item_path)
+        if cache_hits:
+            self.output(f"Using {cache_hits} cached file(s) from {self._cache_root}")
+
+        self.create_parent_dirs([dest_path for _, _, dest_path, _ in files] + source_paths)
+        self.download_files(session, repo, commit_sha, [(item_path, blob_sha) for blob_sha, item_path in downloads.items()], max_concurrent)
+        pending = []
+        for (item_path, item_name, dest_path, _), source_path in zip(files, source_paths):
+            conversion = self.process_file(repo, item_path, item_name, commit_sha, source_path, dest_path, convert_to_yaml, opinionated_ordering=opinionated_ordering)
+            if conversion is not None:
+                pending.append(conversion)
+
+        converted = self.convert_recipes_to_yaml([plist_data for _, _, plist_data in pending])
+        for (dest_path, header, _), yaml_text in zip(pending, converted):
+            self.write_file(dest_path, header + yaml_text)
+
+        return [dest_path for _, _, dest_path, _ in files]
 
     def main(self):
         repo = self.env["github_repo"]
@@ -174,13 +478,27 @@ class AutopkgVendorer(Processor):
         convert_to_yaml = self.env.get("convert_to_yaml", True)
         required_license = self.env.get("required_license", None)
         opinionated_ordering = self.env.get("opinionated_ordering", True)
+        cache_root = self.env.get("vendor_cache_dir") or DEFAULT_CACHE_DIR
+        try:
+            max_concurrent = int(self.env.get("max_concurrent_downloads") or MAX_DOWNLOAD_WORKERS)
+        except (TypeError, ValueError):
+            raise ProcessorError("max_concurrent_downloads must be an integer")
+        if max_concurrent < 1:
+            raise ProcessorError("max_concurrent_downloads must be at least 1.")
 
+        # Every header written in this run shares the commit, URL prefix and timestamp.
+        self._commit_sha = commit_sha
+        self._blob_url_prefix = f"https://github.com/{repo}/blob/{commit_sha}/"
+        self._timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
 
         os.makedirs(destination_path, exist_ok=True)
         gh_session = GitHubSession(github_token)
+        self._cache_root = cache_root
+        self._cache_dir = self.commit_cache_dir(cache_root, commit_sha)
+        tree = self.fetch_tree(gh_session, repo, commit_sha)
 
         if required_license:
-            found_license = self.license_type(gh_session, repo, commit_sha)
+            found_license = self.license_type(gh_session, repo, commit_sha, tree)
             if not found_license == required_license:
                 raise ProcessorError(f"Input variable license_type ({required_license}) does not match the found license ({found_license}).")
 
@@ -192,7 +510,10 @@ class AutopkgVendorer(Processor):
             dest_base=destination_path,
             convert_to_yaml=convert_to_yaml,
             opinionated_ordering=opinionated_ordering,
+            tree=tree,
+            max_concurrent=max_concurrent,
         )
+        self.prune_cache(cache_root)
 
         self.env["downloaded_folder_path"] = destination_path
         self.output(f"Downloaded folder available at: {destination_path}")
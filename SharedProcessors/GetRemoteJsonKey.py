@@ -1,9 +1,33 @@
 from autopkglib import Processor, ProcessorError, URLGetter
 import hashlib
 import json
+import re
+
+# orjson parses large payloads several times faster; AutoPkg's Python doesn't
+# bundle it, so fall back to the standard library when it isn't installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 __all__ = ["GetRemoteJsonKey"]
 
+# orjson only holds integers up to 64 bits and turns longer ones into floats,
+# where json keeps them exact. Any run of 20+ digits might be one of those.
+LONG_INTEGER_RE = re.compile(rb"\d{20,}")
+
+
+def json_loads(data: bytes):
+    """Parse `data` with orjson when it is installed and would give the same result as json.loads."""
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects some input json accepts, such as a UTF-8 BOM or NaN.
+            pass
+    return json.loads(data)
+
+
 class GetRemoteJsonKey(URLGetter):
     input_variables = {
         "url": {
@@ -39,7 +63,7 @@ class GetRemoteJsonKey(URLGetter):
         self.output(f"Fetching JSON from URL: {url}")
 
         try:
-            jdata = json.loads(data)
+            jdata = json_loads(data)
             extracted_value = jdata.get(key, None)
             self.env[output_variable] = extracted_value
             self.output(f"{output_variable}: {extracted_value}")
@@ -11,7 +11,7 @@ class Shellout(Processor):
     input_variables = {
         "command": {
             "required": True,
-            "description": "The shell command to execute.",
+            "description": "The shell command to execute, as a string or an array of arguments.",
         },
         "timeout": {
             "required": False,
@@ -39,7 +39,8 @@ class Shellout(Processor):
         Executes a shell command with a timeout and optional live output.
 
         Args:
-            command (str): The shell command to execute.
+            command (str or list): The shell command to execute. A list is
+                used as the argument vector as-is, skipping shlex.split.
             timeout (int): The timeout in seconds.
             live_output (bool): Whether to display the output live.
 
@@ -47,8 +48,9 @@ class Shellout(Processor):
             tuple: stdout, stderr, return_code
         """
         try:
+            args = list(command) if isinstance(command, (list, tuple)) else shlex.split(command)
             process = subprocess.run(
-                shlex.split(command),
+                args,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 timeout=timeout,
@@ -7,6 +7,17 @@
 
 from collections import OrderedDict
 
+# Top-level recipe keys in output order; anything else is dropped.
+RECIPE_KEY_ORDER = (
+    "Comment",
+    "Description",
+    "Identifier",
+    "ParentRecipe",
+    "MinimumVersion",
+    "Input",
+    "Process",
+    "ParentRecipeTrustInfo",
+)
 
 def optimise_autopkg_recipes(recipe):
     """If input is an AutoPkg recipe, optimise the yaml output in 3 ways to aid
@@ -37,17 +48,7 @@ def optimise_autopkg_recipes(recipe):
             input.move_to_end("NAME")
         recipe["Input"] = OrderedDict(reversed(list(input.items())))
 
-    desired_order = [
-        "Comment",
-        "Description",
-        "Identifier",
-        "ParentRecipe",
-        "MinimumVersion",
-        "Input",
-        "Process",
-        "ParentRecipeTrustInfo",
-    ]
-    desired_list = [k for k in desired_order if k in recipe]
+    desired_list = [k for k in RECIPE_KEY_ORDER if k in recipe]
     reordered_recipe = {k: recipe[k] for k in desired_list}
     reordered_recipe = OrderedDict(reordered_recipe)
     return reordered_recipe
@@ -15,10 +15,11 @@ The output file can be omitted. In this case, the name of the output file is
 taken from the input file, with .yaml added to the end.
 """
 
-import subprocess
+import re
 import sys
 
 from collections import OrderedDict
+from io import StringIO
 
 try:
     from plistlib import load as load_plist  # Python 3
@@ -27,29 +28,14 @@ except ImportError:
     from plistlib import readPlist as load_plist
 
 try:
-    from ruamel.yaml import dump
-    from ruamel.yaml import add_representer
-    from ruamel.yaml.nodes import MappingNode
-except ImportError:
-    subprocess.check_call([sys.executable, "-m", "ensurepip"])
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "pip"])
-    subprocess.check_call(
-        [
-            sys.executable,
-            "-m",
-            "pip",
-            "install",
-            "-U",
-            "pip",
-            "setuptools",
-            "wheel",
-            "ruamel.yaml<0.18.0",
-            "--user",
-        ]
-    )
-    from ruamel.yaml import dump
-    from ruamel.yaml import add_representer
+    from ruamel.yaml import YAML
     from ruamel.yaml.nodes import MappingNode
+    from ruamel.yaml.representer import SafeRepresenter
+except ImportError as e:
+    raise ImportError(
+        "ruamel.yaml is required; install it with "
+        "'pip install \"ruamel.yaml<0.18.0\" ruamel.yaml.clib'"
+    ) from e
 
 from . import handle_autopkg_recipes
 
@@ -66,6 +52,43 @@ def represent_ordereddict(dumper, data):
     return MappingNode("tag:yaml.org,2002:map", value)
 
 
+# Strings matching this can't be written as plain block scalars: a leading
+# indicator or document marker, ": " or " #" inside, surrounding spaces, or
+# characters outside printable ASCII (allow_unicode is off).
+NOT_PLAIN_RE = re.compile(r"^(?:[#,\[\]{}&*!|>'\"%@`]|[-?:](?:\s|$)|---|\.\.\.)|:(?:\s|$)|\s#|^ | $|[^ -~]")
+
+
+def represent_str(dumper, data):
+    # When a string must be quoted, the pure-Python emitter picks double
+    # quotes if it contains a newline or a single quote, but libyaml picks
+    # single quotes (folding any newlines). Pin the pure-Python choice so the
+    # output doesn't depend on whether ruamel.yaml.clib is installed.
+    if "\n" in data or ("'" in data and NOT_PLAIN_RE.search(data)):
+        style = '"'
+    else:
+        style = None
+    return dumper.represent_scalar("tag:yaml.org,2002:str", data, style=style)
+
+
+class PlistRepresenter(SafeRepresenter):
+    """Safe representer that keeps mapping keys in insertion order."""
+
+
+PlistRepresenter.add_representer(str, represent_str)
+# Plain dicts need it too: the default representer would sort their keys.
+PlistRepresenter.add_representer(OrderedDict, represent_ordereddict)
+PlistRepresenter.add_representer(dict, represent_ordereddict)
+
+# One safe dumper, built once. It uses the libyaml (C) emitter when
+# ruamel.yaml.clib is installed and the pure-Python one otherwise. The C
+# emitter needs an integer width, so use a large one to avoid line folding.
+_yaml = YAML(typ="safe", pure=False)
+_yaml.Representer = PlistRepresenter
+_yaml.default_flow_style = False
+_yaml.allow_unicode = False
+_yaml.width = 1 << 30
+
+
 def normalize_types(input_data):
     """This allows YAML and JSON to store Data fields as strings while preserving order."""
     if sys.version_info.major == 3 and isinstance(input_data, bytes):
@@ -75,16 +98,46 @@ def normalize_types(input_data):
     if isinstance(input_data, list):
         return [normalize_types(child) for child in input_data]
     if isinstance(input_data, dict):
-        retval = OrderedDict()
-        for key in input_data:
-            retval[key] = normalize_types(input_data[key])
-        return retval
+        # Plain dicts keep insertion order on Python 3.7+.
+        return {key: normalize_types(value) for key, value in input_data.items()}
     return input_data
 
+
+def _normalize_ordered(mapping, first=(), last=()):
+    """Normalize a dict's values, moving the given keys to the front or back."""
+    keys = [key for key in first if key in mapping]
+    keys += [key for key in mapping if key not in first and key not in last]
+    keys += [key for key in last if key in mapping]
+    return OrderedDict((key, normalize_types(mapping[key])) for key in keys)
+
+
+def normalize_recipe(recipe):
+    """Normalize an AutoPkg recipe and apply optimise_autopkg_recipes' ordering
+    in the same walk, rather than normalizing first and reordering after."""
+    ordered = OrderedDict()
+    for key in handle_autopkg_recipes.RECIPE_KEY_ORDER:
+        if key not in recipe:
+            continue
+        if key == "Process":
+            ordered[key] = [
+                _normalize_ordered(processor, last=("Comment", "Arguments"))
+                for processor in recipe[key]
+            ]
+        elif key == "Input":
+            inputs = recipe[key]
+            if "NAME" not in inputs:
+                # optimise_autopkg_recipes reverses Input when NAME is absent.
+                inputs = OrderedDict(reversed(list(inputs.items())))
+            ordered[key] = _normalize_ordered(inputs, first=("NAME",))
+        else:
+            ordered[key] = normalize_types(recipe[key])
+    return ordered
+
 def convert(xml):
     """Do the conversion."""
-    add_representer(OrderedDict, represent_ordereddict)
-    return dump(xml, width=float("inf"), default_flow_style=False)
+    stream = StringIO()
+    _yaml.dump(xml, stream)
+    return stream.getvalue()
 
 
 def plist_yaml(in_path, out_path):
@@ -100,15 +153,12 @@ def plist_yaml(in_path, out_path):
 
 def plist_yaml_from_dict(input_data: dict):
     """Convert plist to yaml from string."""
-    normalized = normalize_types(input_data)
-
     # handle conversion of AutoPkg recipes
     if sys.version_info.major == 3 and input_data.get("name", "").endswith((".recipe", ".recipe.plist")):
-        normalized = handle_autopkg_recipes.optimise_autopkg_recipes(normalized)
-        output = convert(normalized)
+        output = convert(normalize_recipe(input_data))
         output = handle_autopkg_recipes.format_autopkg_recipes(output)
     else:
-        output = convert(normalized)
+        output = convert(normalize_types(input_data))
 
     return output
 